@@ -1,9 +1,9 @@
-from collections import namedtuple
-import itertools as it
-import random
+from collections import deque
+from multiprocessing import Pool
+import os
+import numpy as np
 import click
 
-Edge = namedtuple('Edge', 'u v capacity')
 
 @click.command()
 @click.argument('filename')
@@ -11,50 +11,79 @@ Edge = namedtuple('Edge', 'u v capacity')
 @click.option('--layer-size', default=220)
 @click.option('--n-layers', default=220)
 @click.option('--connect-ratio', default=1)
-def cli(filename, flow, layer_size, n_layers, connect_ratio):
-    generate_file(filename, flow, layer_size, n_layers, connect_ratio)
+@click.option('--seed', type=int, default=None)
+@click.option('--processes', type=int, default=None)
+def cli(filename, flow, layer_size, n_layers, connect_ratio, seed, processes):
+    generate_file(filename, flow, layer_size, n_layers, connect_ratio, seed, processes)
 
-def generate_file(filename, flow, layer_size, n_layers, connect_ratio):
-    edges = generate_network(flow, layer_size, n_layers, connect_ratio)
+def generate_file(filename, flow, layer_size, n_layers, connect_ratio, seed=None,
+                  processes=None):
+    # Checked before the output file is opened so a bad ratio leaves no
+    # half-written graph behind.
+    if layer_edge_count(layer_size, connect_ratio) > layer_size * layer_size:
+        raise click.BadParameter(
+            '{0} needs more edges than a layer of {1} can hold'.format(
+                connect_ratio, layer_size),
+            param_hint="'--connect-ratio'")
+    n = layer_size * n_layers
+    n_edges = (n_layers - 1) * layer_edge_count(layer_size, connect_ratio) + 2 * layer_size
     with open(filename, 'w') as f:
-        n = layer_size * n_layers
-        f.write('p max {0} {1}\n'.format(layer_size * n_layers + 2, len(edges)))
+        f.write('p max {0} {1}\n'.format(n + 2, n_edges))
         f.write('n {0} s\n'.format(n))
         f.write('n {0} t\n'.format(n + 1))
-        for _, v in edges.items():
-            f.write('a {0} {1} {2}\n'.format(v.u, v.v, v.capacity))
+        for u, v, capacity in generate_network(
+                flow, layer_size, n_layers, connect_ratio, seed, processes):
+            f.write(''.join(f'a {a} {b} {c}\n'
+                            for a, b, c in zip(u.tolist(), v.tolist(), capacity.tolist())))
+
 
+def layer_edge_count(layer_size, connect_ratio):
+    if connect_ratio > 1:
+        return layer_size + int(connect_ratio * layer_size)
+    return layer_size
 
-def generate_network(flow, layer_size, n_layers, connect_ratio):
-    edges = dict()
+def generate_network(flow, layer_size, n_layers, connect_ratio, seed=None,
+                     processes=None):
+    # Each layer seeds its own generator from (entropy, layer), which keeps
+    # the output independent of how layers are spread over worker processes.
+    entropy = np.random.SeedSequence(seed).entropy
+    # Keep only a couple of layers per worker in flight so finished layers
+    # can't pile up faster than the caller writes them out.
+    window = 2 * (processes or os.cpu_count() or 1)
+    pending = deque()
+    with Pool(processes) as pool:
+        for layer in range(n_layers - 1):
+            pending.append(pool.apply_async(
+                rand_from_layer, (flow, layer_size, connect_ratio, entropy, layer)))
+            if len(pending) >= window:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
     n = layer_size * n_layers
-    for i in range(n_layers - 1):
-        for k, v in rand_from_layer(flow, i, layer_size, connect_ratio).items():
-            edges[k] = v
-    for i in range(layer_size):
-        edges[(n, i)] = Edge(n, i, random.randint(1, flow))
-        edges[(i + (n_layers - 1) * layer_size, n + 1)] = Edge(
-            i + (n_layers - 1) * layer_size,
-            n + 1,
-            random.randint(1, flow))
-    return edges
-
-def rand_from_layer(flow, layer, layer_size, connect_ratio):
-    left = [i for i in range(layer *  layer_size, (layer + 1) * layer_size)]
-    right = [i for i in range((layer + 1) * layer_size, (layer + 2) * layer_size)]
-    random.shuffle(left)
-    random.shuffle(right)
-    edges = {(u, v): Edge(u, v, flow) for u, v in zip(left, right)}
+    first = np.arange(layer_size)
+    rng = np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(n_layers - 1,)))
+    yield np.full(layer_size, n), first, rng.integers(1, flow + 1, size=layer_size)
+    yield (first + (n_layers - 1) * layer_size, np.full(layer_size, n + 1),
+           rng.integers(1, flow + 1, size=layer_size))
+
+def rand_from_layer(flow, layer_size, connect_ratio, entropy, layer):
+    rng = np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(layer,)))
+    left = np.arange(layer_size)
+    right = rng.permutation(layer_size)
+    capacity = np.full(layer_size, flow, dtype=np.int64)
     if connect_ratio > 1:
-        all_edges = list(it.product(left, right))
-        random.shuffle(all_edges)
-        i = 0
-        while i < int(connect_ratio * layer_size):
-            e = all_edges.pop()
-            if e not in edges:
-                edges[e] = Edge(e[0], e[1], random.randint(1, flow))
-                i += 1
-    return edges
+        k = int(connect_ratio * layer_size)
+        # At most layer_size draws can land on the matching, so k + layer_size
+        # distinct draws always leave k fresh edges. choice() uses Floyd's
+        # O(k) sampler for sparse layers, but once k + layer_size exceeds
+        # layer_size**2 / 50 it shuffles all layer_size**2 keys instead.
+        draws = rng.choice(layer_size * layer_size, size=k + layer_size, replace=False)
+        ui, vi = np.divmod(draws, layer_size)
+        fresh = right[ui] != vi
+        left = np.concatenate([left, ui[fresh][:k]])
+        right = np.concatenate([right, vi[fresh][:k]])
+        capacity = np.concatenate([capacity, rng.integers(1, flow + 1, size=k)])
+    return left + layer * layer_size, right + (layer + 1) * layer_size, capacity
 
 
 if __name__ == '__main__':
@@ -1,24 +1,25 @@
-from collections import namedtuple
 import matplotlib.pyplot as plt
 from scipy import stats
-from fn import _
-from functional import seq
 import numpy as np
+import pandas as pd
 
-Result = namedtuple('Result', 'algorithm vertexes edges flow runtime')
+COLUMNS = ['algorithm', 'vertexes', 'edges', 'flow', 'runtime']
 plt.style.use('ggplot')
 
-def parse_line(line):
-    tokens = list(map(lambda x: x.split(':')[1], line.strip().split('\t')))
-    return Result(tokens[0], int(tokens[1]), int(tokens[2]),
-                  int(tokens[3]), float(tokens[4].replace('s', '')))
+def read_results(filename):
+    data = pd.read_csv(filename, sep='\t', header=None, names=COLUMNS)
+    for column in COLUMNS:
+        data[column] = data[column].str.split(':').str[1]
+    data['runtime'] = data['runtime'].str.rstrip('s').astype(float)
+    data[['vertexes', 'edges', 'flow']] = data[['vertexes', 'edges', 'flow']].astype(np.int64)
+    return data
 
 def plot(filename):
-    data = seq.open(filename).map(parse_line)
-    bfs = data.filter(_.algorithm == 'bfs')
-    dfs = data.filter(_.algorithm == 'dfs')
-    x = np.array(bfs.map(lambda x: x.vertexes * x.edges * x.edges).list())
-    y = np.array(bfs.map(_.runtime).list())
+    data = read_results(filename)
+    bfs = data[data.algorithm == 'bfs']
+    dfs = data[data.algorithm == 'dfs']
+    x = bfs.vertexes.values * bfs.edges.values.astype(float) ** 2
+    y = bfs.runtime.values
     slope, intercept, r_value, p_value, std_err = stats.linregress(x, y)
     print(slope, intercept, r_value, p_value, std_err)
     plt.title('Numerical Performance of Edmonds-Karp')
@@ -27,24 +28,17 @@ def plot(filename):
     plt.scatter(x, y)
     plt.show()
     plt.clf()
-    ff_data = dfs.map(lambda x: (x.flow, x.flow * x.edges, x.runtime)).group_by(_[0]).cache()
     plt.title('Numerical Performance of Ford-Fulkerson')
     plt.xlabel('Input Size in Ef')
     plt.ylabel('Running Time in Seconds')
-    max_flow = ff_data.max_by(lambda kv: kv[0])[0]
-    all_x = list()
-    all_y = list()
-    for k, v in ff_data:
-        x = list(map(_[1], v))
-        all_x.extend(x)
-        y = list(map(_[2], v))
-        all_y.extend(y)
+    max_flow = dfs.flow.max()
+    for k, v in dfs.groupby('flow'):
         ratio = 1 - k / max_flow
         if ratio > .8:
             ratio = .8
-        plt.scatter(x, y, color=str(ratio))
-    x = np.array(all_x)
-    y = np.array(all_y)
+        plt.scatter(v.flow.values * v.edges.values, v.runtime.values, color=str(ratio))
+    x = dfs.flow.values * dfs.edges.values
+    y = dfs.runtime.values
     slope, intercept, r_value, p_value, std_err = stats.linregress(x, y)
     print(slope, intercept, r_value, p_value, std_err)
     plt.show()
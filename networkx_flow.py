@@ -1,41 +1,140 @@
 import click
+import mmap
 import time
+import numpy as np
 import networkx as nx
 from networkx.algorithms.flow import edmonds_karp
 from networkx.drawing.nx_pydot import write_dot
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import maximum_flow
 
 
+ARC_CHUNK = 1 << 24
+
+def read_dicaps(input_file):
+    with open(input_file, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        meta = mm.readline().split()
+        n_vertexes = int(meta[2])
+        source = int(mm.readline().split()[1])
+        sink = int(mm.readline().split()[1])
+        edges = np.empty((int(meta[3]), 3), dtype=np.int64)
+        flat = edges.reshape(-1)
+        # Every remaining line is 'a u v c': dropping the tags leaves a flat
+        # run of integers that numpy can scan in a single pass. Going through
+        # the map a line-aligned chunk at a time bounds the bytes copies.
+        start, filled = mm.tell(), 0
+        while start < len(mm):
+            end = mm.find(b'\n', min(start + ARC_CHUNK, len(mm)) - 1) + 1 or len(mm)
+            try:
+                values = np.fromstring(mm[start:end].translate(None, b'a'),
+                                       dtype=np.int64, sep=' ')
+            except ValueError:
+                raise click.ClickException(
+                    "{0}: line {1} is not an 'a u v c' arc line".format(
+                        input_file, first_bad_line(mm, start, end)))
+            if filled + len(values) <= flat.size:
+                flat[filled:filled + len(values)] = values
+            filled += len(values)
+            start = end
+        if filled != flat.size:
+            raise click.ClickException(
+                '{0}: header declares {1} arcs but found {2}{3}'.format(
+                    input_file, len(edges), filled // 3,
+                    ' and a truncated one' if filled % 3 else ''))
+        return n_vertexes, source, sink, merge_parallel_arcs(edges)
+
+def first_bad_line(mm, start, end):
+    line_number = mm[:start].count(b'\n') + 1
+    for line in mm[start:end].splitlines():
+        tokens = line.split()
+        if len(tokens) != 4 or tokens[0] != b'a' or not all(t.isdigit() for t in tokens[1:]):
+            return line_number
+        line_number += 1
+    return line_number
+
+def merge_parallel_arcs(edges):
+    # Parallel arcs carry the sum of their capacities. Collapsing them here
+    # hands every backend the same graph; nx.DiGraph would otherwise keep
+    # only the last arc while scipy and igraph add them up.
+    if len(edges) == 0:
+        return edges
+    keys = edges[:, 0] * (edges[:, 1].max() + 1) + edges[:, 1]
+    order = np.argsort(keys)
+    keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    if len(starts) == len(edges):
+        return edges
+    merged = edges[order[starts]]
+    merged[:, 2] = np.add.reduceat(edges[order, 2], starts)
+    return merged
+
 def parse_dicaps_graph(input_file):
-    with open(input_file, 'r') as f:
-        f.readline()
-        source = int(f.readline().split()[1])
-        sink = int(f.readline().split()[1])
-        G = nx.DiGraph()
-        for line in f.readlines():
-            _, u, v, c = line.split()
-            u = int(u)
-            v = int(v)
-            G.add_edge(u, v, capacity=int(c))
-        return G, source, sink
+    _, source, sink, edges = read_dicaps(input_file)
+    G = nx.DiGraph((u, v, {'capacity': c}) for u, v, c in edges.tolist())
+    return G, source, sink
+
+def parse_dicaps_matrix(input_file):
+    n_vertexes, source, sink, edges = read_dicaps(input_file)
+    u, v, c = edges.T
+    G = csr_matrix((c, (u, v)), shape=(n_vertexes, n_vertexes))
+    # scipy's maximum_flow only handles int32 capacities; parallel arcs have
+    # already been summed into one entry here.
+    if G.nnz and G.data.max() > np.iinfo(np.int32).max:
+        raise click.ClickException(
+            'capacities above {0} overflow the scipy backend; '
+            'use --backend nx or --backend igraph'.format(np.iinfo(np.int32).max))
+    G.data = G.data.astype(np.int32)
+    return G, source, sink
+
+def parse_dicaps_igraph(input_file):
+    # igraph is only needed for this backend, so don't require it elsewhere.
+    import igraph as ig
+    n_vertexes, source, sink, edges = read_dicaps(input_file)
+    G = ig.Graph(n=n_vertexes, edges=edges[:, :2].tolist(), directed=True)
+    G.es['capacity'] = edges[:, 2].tolist()
+    return G, source, sink
 
 @click.command()
 @click.option('--ek', is_flag=True)
+@click.option('--backend', type=click.Choice(['scipy', 'igraph', 'nx']), default='scipy')
 @click.option('--draw', is_flag=True)
 @click.argument('input_file')
-def cli(ek, draw, input_file):
-    g, source, sink = parse_dicaps_graph(input_file)
+def cli(ek, backend, draw, input_file):
     if draw:
+        g, _, _ = parse_dicaps_graph(input_file)
         write_dot(g, 'graph.dot')
         return
-    if ek:
-        print('Using Edmonds Karp')
-        flow_func = edmonds_karp
+    if backend == 'nx':
+        g, source, sink = parse_dicaps_graph(input_file)
+        if ek:
+            print('Using Edmonds Karp')
+            flow_func = edmonds_karp
+        else:
+            print('Using Preflow Push')
+            flow_func = None
+        t0 = time.time()
+        flow = nx.maximum_flow_value(g, source, sink, flow_func=flow_func)
+        t1 = time.time()
+    elif backend == 'igraph':
+        if ek:
+            raise click.UsageError('--ek is not supported by the igraph backend')
+        g, source, sink = parse_dicaps_igraph(input_file)
+        print('Using Push Relabel')
+        t0 = time.time()
+        flow = int(g.maxflow_value(source, sink, capacity='capacity'))
+        t1 = time.time()
     else:
-        print('Using Preflow Push')
-        flow_func = None
-    t0 = time.time()
-    flow = nx.maximum_flow_value(g, source, sink, flow_func=flow_func)
-    t1 = time.time()
+        g, source, sink = parse_dicaps_matrix(input_file)
+        if ek:
+            print('Using Edmonds Karp')
+            method = 'edmonds_karp'
+        else:
+            print('Using Dinic')
+            method = 'dinic'
+        t0 = time.time()
+        flow = maximum_flow(g, source, sink, method=method).flow_value
+        t1 = time.time()
     print("Max Flow Solution: {0}".format(flow))
     print("Runtime: {0}s".format(t1 - t0))
 
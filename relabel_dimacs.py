@@ -1,8 +1,13 @@
 import click
-from functional import seq
-from collections import namedtuple
+import numpy as np
 
-Edge = namedtuple('Edge', 'u v cap')
+
+def relabel(nodes, vertex):
+    i = int(np.searchsorted(nodes, vertex))
+    if i == len(nodes) or nodes[i] != vertex:
+        raise click.ClickException(
+            'vertex {0} is not on any edge with nonzero capacity'.format(vertex))
+    return i
 
 @click.command()
 @click.argument('source_file')
@@ -13,23 +18,21 @@ def cli(source_file, destination_file):
         n_vertexes = meta[2]
         source = int(f.readline().split()[1])
         sink = int(f.readline().split()[1])
-        edges = seq(f.readlines())\
-            .map(str.split)\
-            .filter(lambda e: len(e) == 4)\
-            .map(lambda e: Edge(int(e[1]), int(e[2]), int(e[3])))\
-            .filter(lambda e: e.cap != 0).cache()
-        vertex_map = edges.flat_map(lambda e: (e.u, e.v)).distinct().zip_with_index().to_dict()
+        edges = np.loadtxt((line for line in f if line.startswith('a')),
+                           usecols=(1, 2, 3), dtype=np.int64, ndmin=2)
+    edges = edges[edges[:, 2] != 0]
+    u, v, cap = edges.T
+    nodes, inv = np.unique(np.concatenate([u, v]), return_inverse=True)
+    new_u = inv[:len(u)]
+    new_v = inv[len(u):]
 
-        source = vertex_map[source]
-        sink = vertex_map[sink]
-        new_edges = edges.map(
-            lambda e: "a {0} {1} {2}".format(vertex_map[e.u], vertex_map[e.v], e.cap))
+    source = relabel(nodes, source)
+    sink = relabel(nodes, sink)
     with open(destination_file, 'w') as o:
-        print('p max {0} {1}'.format(n_vertexes, new_edges.len()), file=o)
+        print('p max {0} {1}'.format(n_vertexes, len(cap)), file=o)
         print('n {0} s'.format(source), file=o)
         print('n {0} t'.format(sink), file=o)
-        for e in new_edges:
-            print(e, file=o)
+        np.savetxt(o, np.column_stack([new_u, new_v, cap]), fmt='a %d %d %d')
 
 
 if __name__ == '__main__':